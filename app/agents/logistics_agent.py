@@ -282,7 +282,7 @@ class LogisticsAgent(BaseAgent):
                 
                 supplier_evaluations.append({
                     'supplier_id': supplier_id,
-                    'supplier_name': db.query(Supplier).filter(Supplier.id == supplier_id).first().name,
+                    'supplier_name': db.get(Supplier, supplier_id).name,
                     'unit_cost': supplier_product.unit_cost,
                     'lead_time_days': supplier_product.lead_time_days,
                     'minimum_order_quantity': supplier_product.minimum_order_quantity,
@@ -338,7 +338,7 @@ class LogisticsAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get shipment information
-            shipment = db.query(Shipment).filter(Shipment.id == shipment_id).first()
+            shipment = db.get(Shipment, shipment_id)
             if not shipment:
                 return self.create_error_response("Shipment not found")
             
@@ -403,7 +403,7 @@ class LogisticsAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get shipment information
-            shipment = db.query(Shipment).filter(Shipment.id == shipment_id).first()
+            shipment = db.get(Shipment, shipment_id)
             if not shipment:
                 return self.create_error_response("Shipment not found")
             
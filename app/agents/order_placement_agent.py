@@ -148,7 +148,7 @@ class OrderPlacementAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get product and inventory information
-            product = db.query(Product).filter(Product.id == product_id).first()
+            product = db.get(Product, product_id)
             inventory = db.query(Inventory).filter(Inventory.product_id == product_id).first()
             
             if not product or not inventory:
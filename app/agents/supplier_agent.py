@@ -77,7 +77,7 @@ class SupplierAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get product information
-            product = db.query(Product).filter(Product.id == product_id).first()
+            product = db.get(Product, product_id)
             if not product:
                 return self.create_error_response("Product not found")
             
@@ -142,8 +142,8 @@ class SupplierAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get product and supplier information
-            product = db.query(Product).filter(Product.id == product_id).first()
-            supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+            product = db.get(Product, product_id)
+            supplier = db.get(Supplier, supplier_id)
             supplier_product = db.query(SupplierProduct).filter(
                 SupplierProduct.product_id == product_id,
                 SupplierProduct.supplier_id == supplier_id
@@ -198,8 +198,8 @@ class SupplierAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get supplier and product information
-            supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
-            product = db.query(Product).filter(Product.id == product_id).first()
+            supplier = db.get(Supplier, supplier_id)
+            product = db.get(Product, product_id)
             
             if not supplier or not product:
                 return self.create_error_response("Supplier or product not found")
@@ -248,7 +248,7 @@ class SupplierAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get product information
-            product = db.query(Product).filter(Product.id == product_id).first()
+            product = db.get(Product, product_id)
             if not product:
                 return self.create_error_response("Product not found")
             
@@ -304,7 +304,7 @@ class SupplierAgent(BaseAgent):
         db = SessionLocal()
         try:
             # Get supplier information
-            supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+            supplier = db.get(Supplier, supplier_id)
             if not supplier:
                 return self.create_error_response("Supplier not found")
             
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from app.database.database import get_db
+from app.schemas.schemas import WorkflowBatchRequest
 from app.agents.supervisor_agent import SupervisorAgent
 from app.agents.demand_forecast_agent import DemandForecastAgent
 from app.agents.order_placement_agent import OrderPlacementAgent
@@ -83,6 +84,51 @@ async def execute_supplier_performance_review(
         )
 
 
+# Workflow name -> coroutine taking that workflow's args; agents are looked up at call time
+_BATCH_WORKFLOWS = {
+    "inventory-management": lambda args: SupervisorAgent().execute_inventory_management_workflow(
+        args["product_ids"]
+    ),
+    "emergency-reorder": lambda args: SupervisorAgent().execute_emergency_reorder_workflow(
+        args["product_id"], args["quantity"]
+    ),
+    "supplier-performance-review": lambda args: SupervisorAgent().execute_supplier_performance_review(),
+    "demand-forecast": lambda args: DemandForecastAgent().execute(args),
+    "order-placement": lambda args: OrderPlacementAgent().execute(args),
+    "supplier-negotiation": lambda args: SupplierAgent().execute(args),
+    "logistics-tracking": lambda args: LogisticsAgent().execute(args),
+}
+
+
+@router.post("/workflow/batch", response_model=dict)
+async def execute_workflow_batch(
+    batch: WorkflowBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Execute several agent workflows in one request, returning their results in order."""
+    unknown = [w.name for w in batch.workflows if w.name not in _BATCH_WORKFLOWS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown workflows: {', '.join(unknown)}"
+        )
+    
+    results = []
+    for workflow in batch.workflows:
+        # One failing workflow is reported in its slot rather than failing the batch
+        try:
+            result = await _BATCH_WORKFLOWS[workflow.name](workflow.args)
+            results.append({"name": workflow.name, "success": bool(result.get("success")), "result": result})
+        except Exception as e:
+            results.append({"name": workflow.name, "success": False, "error": str(e)})
+    
+    return {
+        "success": all(r["success"] for r in results),
+        "message": f"Executed {len(results)} workflows",
+        "results": results
+    }
+
+
 @router.post("/demand-forecast", response_model=dict)
 async def execute_demand_forecast(
     request_data: Dict[str, Any],
@@ -14,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[InventoryWithProduct])
-async def get_inventory(
+def get_inventory(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
@@ -22,7 +22,7 @@ async def get_inventory(
     """Get all inventory items with product details."""
     try:
         inventory_service = InventoryService(db)
-        inventory_items = await inventory_service.get_all_inventory(skip=skip, limit=limit)
+        inventory_items = inventory_service.get_all_inventory(skip=skip, limit=limit)
         return inventory_items
         
     except Exception as e:
@@ -33,14 +33,14 @@ async def get_inventory(
 
 
 @router.get("/{product_id}", response_model=InventoryWithProduct)
-async def get_inventory_by_product(
+def get_inventory_by_product(
     product_id: int,
     db: Session = Depends(get_db)
 ):
     """Get inventory for a specific product."""
     try:
         inventory_service = InventoryService(db)
-        inventory = await inventory_service.get_inventory_by_product_id(product_id)
+        inventory = inventory_service.get_inventory_by_product_id(product_id)
         
         if not inventory:
             raise HTTPException(
@@ -60,7 +60,7 @@ async def get_inventory_by_product(
 
 
 @router.put("/{product_id}", response_model=Inventory)
-async def update_inventory(
+def update_inventory(
     product_id: int,
     inventory_update: InventoryUpdate,
     db: Session = Depends(get_db)
@@ -68,7 +68,7 @@ async def update_inventory(
     """Update inventory for a specific product."""
     try:
         inventory_service = InventoryService(db)
-        inventory = await inventory_service.update_inventory(product_id, inventory_update)
+        inventory = inventory_service.update_inventory(product_id, inventory_update)
         
         if not inventory:
             raise HTTPException(
@@ -88,13 +88,13 @@ async def update_inventory(
 
 
 @router.get("/alerts/low-stock", response_model=List[InventoryAlert])
-async def get_low_stock_alerts(
+def get_low_stock_alerts(
     db: Session = Depends(get_db)
 ):
     """Get low stock alerts."""
     try:
         inventory_service = InventoryService(db)
-        alerts = await inventory_service.get_low_stock_alerts()
+        alerts = inventory_service.get_low_stock_alerts()
         return alerts
         
     except Exception as e:
@@ -114,7 +114,7 @@ async def check_reorder_points(
         
         # Get all product IDs for reorder check
         inventory_service = InventoryService(db)
-        all_inventory = await inventory_service.get_all_inventory()
+        all_inventory = inventory_service.get_all_inventory()
         product_ids = [inv.product_id for inv in all_inventory]
         
         # Execute inventory management workflow
@@ -160,14 +160,14 @@ async def emergency_reorder(
 
 
 @router.get("/analytics/sales-trends", response_model=dict)
-async def get_sales_trends(
+def get_sales_trends(
     days: int = 30,
     db: Session = Depends(get_db)
 ):
     """Get sales trends and analytics."""
     try:
         inventory_service = InventoryService(db)
-        trends = await inventory_service.get_sales_trends(days=days)
+        trends = inventory_service.get_sales_trends(days=days)
         return trends
         
     except Exception as e:
@@ -178,13 +178,13 @@ async def get_sales_trends(
 
 
 @router.get("/analytics/performance", response_model=dict)
-async def get_inventory_performance(
+def get_inventory_performance(
     db: Session = Depends(get_db)
 ):
     """Get inventory performance metrics."""
     try:
         inventory_service = InventoryService(db)
-        performance = await inventory_service.get_inventory_performance()
+        performance = inventory_service.get_inventory_performance()
         return performance
         
     except Exception as e:
@@ -4,11 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database.database import get_db
-from app.schemas.schemas import (
-    OrderCreate, Order, OrderWithDetails, OrderUpdate,
-    OrderItemCreate, CustomerCreate, Customer
-)
-from app.models.models import Order as OrderModel, OrderItem as OrderItemModel, Customer as CustomerModel, Inventory
+from app.schemas.schemas import OrderCreate, Order, OrderWithDetails, OrderUpdate
 from app.services.order_service import OrderService
 from app.services.inventory_service import InventoryService
 
@@ -16,7 +12,7 @@ router = APIRouter()
 
 
 @router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
-async def create_order(
+def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db)
 ):
@@ -25,28 +21,25 @@ async def create_order(
         order_service = OrderService(db)
         inventory_service = InventoryService(db)
         
-        # Check inventory availability for all items
+        # Take stock with atomic conditional UPDATEs; they commit together with the order
         for item in order_data.items:
-            inventory = inventory_service.get_inventory_by_product_id(item.product_id)
-            if not inventory or inventory.available_stock < item.quantity:
+            if not inventory_service.reduce_inventory(
+                item.product_id,
+                item.quantity,
+                "Customer order",
+                commit=False
+            ):
+                db.rollback()
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Insufficient stock for product ID {item.product_id}"
                 )
         
-        # Create the order
-        order = await order_service.create_order(order_data)
-        
-        # Update inventory levels
-        for item in order_data.items:
-            await inventory_service.reduce_inventory(
-                item.product_id, 
-                item.quantity,
-                f"Order {order.order_number}"
-            )
-        
-        return order
+        # Create the order, committing the stock reductions with it
+        return order_service.create_order(order_data)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,7 +48,7 @@ async def create_order(
 
 
 @router.get("/", response_model=List[Order])
-async def get_orders(
+def get_orders(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
@@ -63,7 +56,7 @@ async def get_orders(
     """Get all orders with pagination."""
     try:
         order_service = OrderService(db)
-        orders = await order_service.get_orders(skip=skip, limit=limit)
+        orders = order_service.get_orders(skip=skip, limit=limit)
         return orders
         
     except Exception as e:
@@ -74,14 +67,14 @@ async def get_orders(
 
 
 @router.get("/{order_id}", response_model=OrderWithDetails)
-async def get_order(
+def get_order(
     order_id: int,
     db: Session = Depends(get_db)
 ):
     """Get a specific order by ID."""
     try:
         order_service = OrderService(db)
-        order = await order_service.get_order_by_id(order_id)
+        order = order_service.get_order_by_id(order_id)
         
         if not order:
             raise HTTPException(
@@ -101,7 +94,7 @@ async def get_order(
 
 
 @router.put("/{order_id}", response_model=Order)
-async def update_order(
+def update_order(
     order_id: int,
     order_update: OrderUpdate,
     db: Session = Depends(get_db)
@@ -109,7 +102,7 @@ async def update_order(
     """Update an existing order."""
     try:
         order_service = OrderService(db)
-        order = await order_service.update_order(order_id, order_update)
+        order = order_service.update_order(order_id, order_update)
         
         if not order:
             raise HTTPException(
@@ -129,7 +122,7 @@ async def update_order(
 
 
 @router.post("/{order_id}/process-payment", response_model=dict)
-async def process_payment(
+def process_payment(
     order_id: int,
     payment_data: dict,
     db: Session = Depends(get_db)
@@ -139,7 +132,7 @@ async def process_payment(
         order_service = OrderService(db)
         
         # Simulate payment processing
-        payment_result = await order_service.process_payment(order_id, payment_data)
+        payment_result = order_service.process_payment(order_id, payment_data)
         
         return {
             "success": True,
@@ -156,7 +149,7 @@ async def process_payment(
 
 
 @router.get("/customer/{customer_id}", response_model=List[Order])
-async def get_customer_orders(
+def get_customer_orders(
     customer_id: int,
     skip: int = 0,
     limit: int = 50,
@@ -165,7 +158,7 @@ async def get_customer_orders(
     """Get orders for a specific customer."""
     try:
         order_service = OrderService(db)
-        orders = await order_service.get_orders_by_customer_id(
+        orders = order_service.get_orders_by_customer_id(
             customer_id, skip=skip, limit=limit
         )
         return orders
@@ -1,6 +1,6 @@
 """Application configuration settings."""
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 import os
 
@@ -20,6 +20,9 @@ class Settings(BaseSettings):
     smtp_username: str = ""
     smtp_password: str = ""
     
+    # Vector store
+    chroma_persist_directory: str = "./chroma_db"
+    
     # Supplier emails
     supplier_emails: List[str] = [
         "prageethsandakalum@gmail.com",
@@ -42,9 +45,7 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
 
 settings = Settings()
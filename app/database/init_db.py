@@ -3,7 +3,9 @@
 import asyncio
 from datetime import datetime, timedelta
 import random
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
 from app.database.database import SessionLocal, engine
 from app.models.models import *
 from app.core.config import settings
@@ -14,6 +16,13 @@ def init_database():
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
+    # create_all skips existing tables, so upgrade their generated columns and add missing indexes
+    upgrade_computed_columns()
+    
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     db = SessionLocal()
     try:
         # Check if data already exists
@@ -61,6 +70,49 @@ def init_database():
         db.close()
 
 
+def upgrade_computed_columns():
+    """Recreate columns that the models declare as generated but exist as plain columns."""
+    preparer = engine.dialect.identifier_preparer
+    
+    for table in Base.metadata.sorted_tables:
+        computed_columns = [column for column in table.columns if column.computed is not None]
+        if not computed_columns or not _missing_computed_columns(engine, table, computed_columns):
+            continue
+        
+        table_name = preparer.format_table(table)
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                # Other app workers may be upgrading at the same time; re-check under the lock
+                connection.execute(text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
+            
+            existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            for column in _missing_computed_columns(connection, table, computed_columns):
+                column_ddl = str(CreateColumn(column).compile(dialect=engine.dialect))
+                if engine.dialect.name == "sqlite":
+                    # SQLite can only add VIRTUAL generated columns to an existing table
+                    column_ddl = column_ddl.replace(" STORED", " VIRTUAL")
+                
+                if column.name in existing:
+                    connection.execute(text(
+                        f"ALTER TABLE {table_name} DROP COLUMN {preparer.quote(column.name)}"
+                    ))
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+                print(f"Recreated {table.name}.{column.name} as a generated column")
+
+
+def _missing_computed_columns(bind, table, computed_columns) -> list:
+    """Return the computed columns that the database has as plain columns or lacks entirely."""
+    inspector = inspect(bind)
+    if not inspector.has_table(table.name):
+        return []
+    
+    existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+    return [
+        column for column in computed_columns
+        if "computed" not in existing.get(column.name, {})
+    ]
+
+
 def create_sample_products(db: Session) -> list:
     """Create sample products."""
     products_data = [
@@ -159,7 +211,6 @@ def create_sample_inventory(db: Session, products: list):
             product_id=product.id,
             current_stock=current_stock,
             reserved_stock=0,
-            available_stock=current_stock,
             reorder_point=reorder_point,
             reorder_quantity=reorder_quantity,
             safety_stock=safety_stock,
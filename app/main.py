@@ -2,11 +2,12 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import uvicorn
 from app.core.config import settings
 from app.database.database import engine, Base
+from app.database.init_db import upgrade_computed_columns
 from app.api.v1.endpoints import orders, inventory, agents
 from app.models.models import *  # Import all models to ensure they're registered
 
@@ -19,6 +20,7 @@ async def lifespan(app: FastAPI):
     
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    upgrade_computed_columns()
     print("Database tables created successfully")
     
     yield
@@ -32,7 +34,8 @@ app = FastAPI(
     title=settings.project_name,
     description="AI-powered inventory management system for mini marts",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -88,7 +91,7 @@ async def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -1,6 +1,6 @@
 """Database models for the MiniMart inventory management system."""
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, LargeBinary, Index, Computed
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.database import Base
@@ -127,7 +127,7 @@ class Inventory(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, unique=True)
     current_stock = Column(Integer, nullable=False, default=0)
     reserved_stock = Column(Integer, default=0)  # Stock reserved for pending orders
-    available_stock = Column(Integer, nullable=False, default=0)  # current_stock - reserved_stock
+    available_stock = Column(Integer, Computed("current_stock - reserved_stock", persisted=True))
     reorder_point = Column(Integer, nullable=False, default=10)
     reorder_quantity = Column(Integer, nullable=False, default=50)
     safety_stock = Column(Integer, default=5)
@@ -159,7 +159,7 @@ class Order(Base):
     __tablename__ = "orders"
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     order_number = Column(String(50), unique=True, nullable=False, index=True)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     total_amount = Column(Float, nullable=False)
@@ -195,9 +195,13 @@ class OrderItem(Base):
 class SalesTransaction(Base):
     """Historical sales transactions."""
     __tablename__ = "sales_transactions"
+    __table_args__ = (
+        # Date-range scans grouped by product; also serves date-only filters
+        Index("ix_sales_transactions_date_product", "transaction_date", "product_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
@@ -306,3 +310,28 @@ class AgentInteraction(Base):
     
     # Relationships
     log = relationship("AgentLog", back_populates="agent_interactions")
+
+
+class EmbeddingCache(Base):
+    """Cached document embeddings keyed by content hash."""
+    __tablename__ = "embedding_cache"
+    
+    content_hash = Column(String(64), primary_key=True)  # sha256 of normalized text
+    embedding = Column(Text, nullable=False)  # JSON string
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class KnowledgeBaseBuild(Base):
+    """Last successful build of each RAG collection, used for incremental rebuilds."""
+    __tablename__ = "knowledge_base_builds"
+    
+    collection_name = Column(String(100), primary_key=True)
+    last_built_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class AgentLogEmbeddingCode(Base):
+    """Binary-quantized agent log embeddings for Hamming-distance search."""
+    __tablename__ = "agent_log_embedding_codes"
+    
+    log_id = Column(Integer, ForeignKey("agent_logs.id"), primary_key=True)
+    code = Column(LargeBinary, nullable=False)  # np.packbits(embedding > 0)
@@ -1,31 +1,52 @@
 """RAG (Retrieval-Augmented Generation) system for internal data retrieval."""
 
 import asyncio
+from collections import defaultdict
+import functools
+import hashlib
+import re
+import threading
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
-import pandas as pd
-from sqlalchemy import text
+from sqlalchemy import or_, func, case
+from sqlalchemy.exc import IntegrityError, OperationalError
 from app.database.database import SessionLocal
 from app.models.models import (
-    Product, Inventory, Supplier, SalesTransaction, 
-    ProcurementTransaction, Shipment, AgentLog
+    Product, Inventory, Supplier, SupplierProduct, SalesTransaction,
+    Shipment, AgentLog, EmbeddingCache,
+    KnowledgeBaseBuild, AgentLogEmbeddingCode
 )
 from app.core.config import settings
 
+_WHITESPACE_RE = re.compile(r"\s+")
+# The builders run in parallel threads; one of them writes cache rows at a time
+_EMBEDDING_CACHE_WRITE_LOCK = threading.Lock()
+_TWO_YEARS = timedelta(days=730)
+# Sales and supplier documents change every build, so cached vectors expire
+_EMBEDDING_CACHE_TTL = timedelta(days=7)
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO 8601 string."""
+    return datetime.now(timezone.utc).isoformat()
+
 
 class RAGSystem:
     """RAG system for retrieving and analyzing internal business data."""
     
     def __init__(self):
-        self.chroma_client = chromadb.Client(Settings(
-            chroma_db_impl="duckdb+parquet",
-            persist_directory="./chroma_db"
-        ))
+        self.chroma_client = chromadb.PersistentClient(
+            path=settings.chroma_persist_directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
         self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Per-instance cache so repeated query strings skip the model forward pass
+        self._embed = functools.lru_cache(maxsize=1024)(self._encode_query)
         self.collection_name = "minimart_knowledge"
         self._initialize_collections()
     
@@ -62,43 +83,175 @@ class RAGSystem:
         except Exception as e:
             print(f"Error initializing collections: {e}")
     
+    def _encode_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self.embedding_model.encode(text, convert_to_tensor=False).tolist()
+    
+    @staticmethod
+    def _content_hash(document: str) -> str:
+        """Hash a document with whitespace normalized so re-indented text still matches."""
+        normalized = _WHITESPACE_RE.sub(" ", document).strip()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    
+    def _get_embeddings(self, db, documents: List[str]) -> List[List[float]]:
+        """Get embeddings for documents, reusing cached vectors for unchanged text."""
+        hashes = [self._content_hash(doc) for doc in documents]
+        
+        cached = {
+            entry.content_hash: json.loads(entry.embedding)
+            for entry in db.query(EmbeddingCache).filter(
+                EmbeddingCache.content_hash.in_(set(hashes))
+            )
+        }
+        
+        # Embed only the documents that are not cached yet
+        missing = {}
+        for content_hash, doc in zip(hashes, documents):
+            if content_hash not in cached and content_hash not in missing:
+                missing[content_hash] = doc
+        
+        if missing:
+            vectors = self.embedding_model.encode(
+                list(missing.values()), convert_to_tensor=False
+            )
+            for content_hash, vector in zip(missing, vectors):
+                cached[content_hash] = vector.tolist()
+            
+            with _EMBEDDING_CACHE_WRITE_LOCK:
+                db.add_all(
+                    EmbeddingCache(content_hash=content_hash, embedding=json.dumps(cached[content_hash]))
+                    for content_hash in missing
+                )
+                try:
+                    db.commit()
+                except (IntegrityError, OperationalError):
+                    # Another build cached the same content first, or the database is
+                    # busy (e.g. SQLite locked); skip caching, the vectors are still valid
+                    db.rollback()
+        
+        return [cached[content_hash] for content_hash in hashes]
+    
+    def _sync_collection(
+        self,
+        db,
+        collection,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        current_ids: set
+    ) -> List[List[float]]:
+        """Upsert changed documents and delete ids that no longer exist in the database."""
+        embeddings = []
+        if ids:
+            embeddings = self._get_embeddings(db, documents)
+            collection.upsert(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+        
+        stale_ids = set(collection.get(include=[])['ids']) - current_ids
+        if stale_ids:
+            collection.delete(ids=list(stale_ids))
+        
+        return embeddings
+    
+    @staticmethod
+    def _prune_embedding_cache():
+        """Delete cached embeddings older than the TTL; current text is re-embedded once."""
+        db = SessionLocal()
+        try:
+            db.query(EmbeddingCache).filter(
+                EmbeddingCache.created_at < datetime.now(timezone.utc) - _EMBEDDING_CACHE_TTL
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _get_last_built_at(db, collection_name: str) -> Optional[datetime]:
+        """Get the time the collection was last built, if ever."""
+        build = db.get(KnowledgeBaseBuild, collection_name)
+        return build.last_built_at if build else None
+    
+    @staticmethod
+    def _set_last_built_at(db, collection_name: str, built_at: datetime):
+        """Record a successful build of the collection."""
+        db.merge(KnowledgeBaseBuild(
+            collection_name=collection_name,
+            last_built_at=built_at
+        ))
+        db.commit()
+    
     async def build_knowledge_base(self) -> Dict[str, Any]:
         """Build the knowledge base from database data."""
         try:
-            # Build different knowledge collections
-            product_data = await self._build_product_knowledge()
-            sales_data = await self._build_sales_knowledge()
-            supplier_data = await self._build_supplier_knowledge()
-            agent_data = await self._build_agent_knowledge()
+            # Build different knowledge collections concurrently; each builder
+            # uses its own session and writes to its own collection
+            product_data, sales_data, supplier_data, agent_data = await asyncio.gather(
+                self._build_product_knowledge(),
+                self._build_sales_knowledge(),
+                self._build_supplier_knowledge(),
+                self._build_agent_knowledge()
+            )
+            await asyncio.to_thread(self._prune_embedding_cache)
             
+            # Builders return only the documents they (re)embedded; report collection
+            # sizes separately, since product and agent builds are incremental
             return {
                 'success': True,
                 'collections_built': {
+                    'products': self.product_collection.count(),
+                    'sales': self.sales_collection.count(),
+                    'suppliers': self.supplier_collection.count(),
+                    'agents': self.agent_collection.count()
+                },
+                'documents_updated': {
                     'products': len(product_data),
                     'sales': len(sales_data),
                     'suppliers': len(supplier_data),
                     'agents': len(agent_data)
                 },
-                'built_at': datetime.utcnow().isoformat()
+                'built_at': _now_iso()
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
-                'built_at': datetime.utcnow().isoformat()
+                'built_at': _now_iso()
             }
     
     async def _build_product_knowledge(self) -> List[Dict[str, Any]]:
         """Build product knowledge base."""
         db = SessionLocal()
         try:
-            # Get all products with inventory information
-            products = db.query(Product, Inventory).join(
+            build_started_at = datetime.now(timezone.utc)
+            last_built_at = self._get_last_built_at(db, "products")
+            
+            # Get products with inventory information changed since the last build
+            query = db.query(Product, Inventory).join(
                 Inventory, Product.id == Inventory.product_id
-            ).all()
+            )
+            if last_built_at:
+                query = query.filter(or_(
+                    Product.created_at >= last_built_at,
+                    Product.updated_at >= last_built_at,
+                    Inventory.last_updated >= last_built_at
+                ))
+            products = query.all()
+            
+            current_ids = {
+                f"product_{product_id}"
+                for (product_id,) in db.query(Product.id).join(
+                    Inventory, Product.id == Inventory.product_id
+                )
+            }
             
             product_docs = []
+            documents = []
+            ids = []
             for product, inventory in products:
                 # Create comprehensive product document
                 doc = {
@@ -117,29 +270,36 @@ class RAGSystem:
                 }
                 
                 # Create searchable text
-                searchable_text = f"""
-                Product: {product.name}
-                Category: {product.category.value}
-                Description: {product.description or 'No description'}
-                Brand: {product.brand or 'No brand'}
-                SKU: {product.sku}
-                Current Stock: {inventory.current_stock}
-                Reorder Point: {inventory.reorder_point}
-                Safety Stock: {inventory.safety_stock}
-                Unit Price: ${product.unit_price}
-                Cost Price: ${product.cost_price}
-                Unit of Measure: {product.unit_of_measure}
-                """
-                
-                # Add to collection
-                self.product_collection.add(
-                    documents=[searchable_text],
-                    metadatas=[doc],
-                    ids=[f"product_{product.id}"]
+                searchable_text = (
+                    f"Product: {product.name}\n"
+                    f"Category: {product.category.value}\n"
+                    f"Description: {product.description or 'No description'}\n"
+                    f"Brand: {product.brand or 'No brand'}\n"
+                    f"SKU: {product.sku}\n"
+                    f"Current Stock: {inventory.current_stock}\n"
+                    f"Reorder Point: {inventory.reorder_point}\n"
+                    f"Safety Stock: {inventory.safety_stock}\n"
+                    f"Unit Price: ${product.unit_price}\n"
+                    f"Cost Price: ${product.cost_price}\n"
+                    f"Unit of Measure: {product.unit_of_measure}"
                 )
                 
+                documents.append(searchable_text)
+                ids.append(f"product_{product.id}")
                 product_docs.append(doc)
             
+            # Sync the collection in a single batch off the event loop
+            await asyncio.to_thread(
+                self._sync_collection,
+                db,
+                self.product_collection,
+                documents,
+                product_docs,
+                ids,
+                current_ids
+            )
+            self._set_last_built_at(db, "products", build_started_at)
+            
             return product_docs
             
         finally:
@@ -150,59 +310,71 @@ class RAGSystem:
         db = SessionLocal()
         try:
             # Get sales data for the last 2 years
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=2*365)
-            
-            sales_data = db.query(SalesTransaction, Product).join(
+            end_date = datetime.now(timezone.utc)
+            start_date = end_date - _TWO_YEARS
+            
+            sales_rows = db.query(
+                Product.id,
+                Product.name,
+                SalesTransaction.quantity,
+                SalesTransaction.total_amount
+            ).join(
                 Product, SalesTransaction.product_id == Product.id
             ).filter(
                 SalesTransaction.transaction_date >= start_date
-            ).all()
+            ).yield_per(1000)
             
-            # Group sales by product and time periods
-            sales_summary = {}
-            for transaction, product in sales_data:
-                product_id = product.id
-                if product_id not in sales_summary:
-                    sales_summary[product_id] = {
-                        'product_name': product.name,
-                        'total_quantity': 0,
-                        'total_revenue': 0,
-                        'transaction_count': 0,
-                        'avg_daily_sales': 0,
-                        'recent_trend': 'stable'
-                    }
-                
-                sales_summary[product_id]['total_quantity'] += transaction.quantity
-                sales_summary[product_id]['total_revenue'] += transaction.total_amount
-                sales_summary[product_id]['transaction_count'] += 1
+            # Group sales by product as [quantity, revenue, transaction count, name]
+            sales_totals = defaultdict(lambda: [0, 0, 0, ""])
+            for product_id, product_name, quantity, total_amount in sales_rows:
+                totals = sales_totals[product_id]
+                totals[0] += quantity
+                totals[1] += total_amount
+                totals[2] += 1
+                totals[3] = product_name
             
             # Calculate trends and add to collection
             sales_docs = []
-            for product_id, summary in sales_summary.items():
-                # Calculate average daily sales
-                days_in_period = (end_date - start_date).days
-                summary['avg_daily_sales'] = summary['total_quantity'] / days_in_period
+            documents = []
+            ids = []
+            days_in_period = (end_date - start_date).days
+            sales_period = f"{start_date.date()} to {end_date.date()}"
+            for product_id, (total_quantity, total_revenue, transaction_count, product_name) in sales_totals.items():
+                summary = {
+                    'product_name': product_name,
+                    'total_quantity': total_quantity,
+                    'total_revenue': total_revenue,
+                    'transaction_count': transaction_count,
+                    # Calculate average daily sales
+                    'avg_daily_sales': total_quantity / days_in_period,
+                    'recent_trend': 'stable'
+                }
                 
                 # Create searchable text
-                searchable_text = f"""
-                Product: {summary['product_name']}
-                Total Sales Quantity: {summary['total_quantity']}
-                Total Revenue: ${summary['total_revenue']:.2f}
-                Transaction Count: {summary['transaction_count']}
-                Average Daily Sales: {summary['avg_daily_sales']:.2f}
-                Sales Period: {start_date.date()} to {end_date.date()}
-                """
-                
-                # Add to collection
-                self.sales_collection.add(
-                    documents=[searchable_text],
-                    metadatas=[summary],
-                    ids=[f"sales_{product_id}"]
+                searchable_text = (
+                    f"Product: {summary['product_name']}\n"
+                    f"Total Sales Quantity: {summary['total_quantity']}\n"
+                    f"Total Revenue: ${summary['total_revenue']:.2f}\n"
+                    f"Transaction Count: {summary['transaction_count']}\n"
+                    f"Average Daily Sales: {summary['avg_daily_sales']:.2f}\n"
+                    f"Sales Period: {sales_period}"
                 )
                 
+                documents.append(searchable_text)
+                ids.append(f"sales_{product_id}")
                 sales_docs.append(summary)
             
+            # Sync the collection in a single batch off the event loop
+            await asyncio.to_thread(
+                self._sync_collection,
+                db,
+                self.sales_collection,
+                documents,
+                sales_docs,
+                ids,
+                set(ids)
+            )
+            
             return sales_docs
             
         finally:
@@ -215,25 +387,40 @@ class RAGSystem:
             # Get suppliers with their products and performance data
             suppliers = db.query(Supplier).filter(Supplier.is_active == True).all()
             
+            # Get every active supplier's products in one query
+            products_by_supplier = {}
+            for supplier_id, product_name in db.query(
+                SupplierProduct.supplier_id, Product.name
+            ).join(
+                Product, SupplierProduct.product_id == Product.id
+            ).join(
+                Supplier, SupplierProduct.supplier_id == Supplier.id
+            ).filter(Supplier.is_active == True):
+                products_by_supplier.setdefault(supplier_id, []).append(product_name)
+            
+            # Count recent and on-time shipments per supplier in the database
+            shipment_stats = {
+                supplier_id: (total, on_time or 0)
+                for supplier_id, total, on_time in db.query(
+                    Shipment.supplier_id,
+                    func.count(Shipment.id),
+                    func.sum(case(
+                        (Shipment.actual_delivery_date <= Shipment.expected_delivery_date, 1),
+                        else_=0
+                    ))
+                ).filter(
+                    Shipment.created_at >= datetime.now(timezone.utc) - timedelta(days=90)
+                ).group_by(Shipment.supplier_id)
+            }
+            
             supplier_docs = []
+            documents = []
+            ids = []
             for supplier in suppliers:
-                # Get supplier's products
-                supplier_products = db.query(SupplierProduct, Product).join(
-                    Product, SupplierProduct.product_id == Product.id
-                ).filter(SupplierProduct.supplier_id == supplier.id).all()
-                
-                # Get recent shipments
-                recent_shipments = db.query(Shipment).filter(
-                    Shipment.supplier_id == supplier.id,
-                    Shipment.created_at >= datetime.utcnow() - timedelta(days=90)
-                ).all()
+                products_supplied = products_by_supplier.get(supplier.id, [])
                 
                 # Calculate performance metrics
-                total_shipments = len(recent_shipments)
-                on_time_deliveries = sum(1 for s in recent_shipments 
-                                       if s.actual_delivery_date and s.expected_delivery_date 
-                                       and s.actual_delivery_date <= s.expected_delivery_date)
-                
+                total_shipments, on_time_deliveries = shipment_stats.get(supplier.id, (0, 0))
                 on_time_rate = (on_time_deliveries / total_shipments * 100) if total_shipments > 0 else 0
                 
                 supplier_doc = {
@@ -244,34 +431,40 @@ class RAGSystem:
                     'payment_terms': supplier.payment_terms or '',
                     'lead_time_days': supplier.delivery_lead_time_days,
                     'minimum_order_value': supplier.minimum_order_value,
-                    'product_count': len(supplier_products),
+                    'product_count': len(products_supplied),
                     'recent_shipments': total_shipments,
                     'on_time_delivery_rate': on_time_rate,
-                    'products_supplied': [p.name for _, p in supplier_products]
+                    'products_supplied': products_supplied
                 }
                 
                 # Create searchable text
-                searchable_text = f"""
-                Supplier: {supplier.name}
-                Contact: {supplier.contact_person or 'N/A'}
-                Email: {supplier.email}
-                Payment Terms: {supplier.payment_terms or 'N/A'}
-                Lead Time: {supplier.delivery_lead_time_days} days
-                Minimum Order: ${supplier.minimum_order_value}
-                Products Supplied: {', '.join(supplier_doc['products_supplied'])}
-                Recent Shipments: {total_shipments}
-                On-Time Delivery Rate: {on_time_rate:.1f}%
-                """
-                
-                # Add to collection
-                self.supplier_collection.add(
-                    documents=[searchable_text],
-                    metadatas=[supplier_doc],
-                    ids=[f"supplier_{supplier.id}"]
+                searchable_text = (
+                    f"Supplier: {supplier.name}\n"
+                    f"Contact: {supplier.contact_person or 'N/A'}\n"
+                    f"Email: {supplier.email}\n"
+                    f"Payment Terms: {supplier.payment_terms or 'N/A'}\n"
+                    f"Lead Time: {supplier.delivery_lead_time_days} days\n"
+                    f"Minimum Order: ${supplier.minimum_order_value}\n"
+                    f"Products Supplied: {', '.join(supplier_doc['products_supplied'])}\n"
+                    f"Recent Shipments: {total_shipments}\n"
+                    f"On-Time Delivery Rate: {on_time_rate:.1f}%"
                 )
                 
+                documents.append(searchable_text)
+                ids.append(f"supplier_{supplier.id}")
                 supplier_docs.append(supplier_doc)
             
+            # Sync the collection in a single batch off the event loop
+            await asyncio.to_thread(
+                self._sync_collection,
+                db,
+                self.supplier_collection,
+                documents,
+                supplier_docs,
+                ids,
+                set(ids)
+            )
+            
             return supplier_docs
             
         finally:
@@ -281,12 +474,27 @@ class RAGSystem:
         """Build agent knowledge base from logs."""
         db = SessionLocal()
         try:
-            # Get recent agent logs
-            recent_logs = db.query(AgentLog).filter(
-                AgentLog.created_at >= datetime.utcnow() - timedelta(days=30)
-            ).order_by(AgentLog.created_at.desc()).limit(1000).all()
+            build_started_at = datetime.now(timezone.utc)
+            last_built_at = self._get_last_built_at(db, "agent_logs")
+            
+            # Get recent agent logs; logs are immutable, so only new ones need embedding
+            window_start = build_started_at - timedelta(days=30)
+            current_log_ids = [
+                log_id
+                for (log_id,) in db.query(AgentLog.id).filter(
+                    AgentLog.created_at >= window_start
+                ).order_by(AgentLog.created_at.desc()).limit(1000)
+            ]
+            current_ids = {f"agent_log_{log_id}" for log_id in current_log_ids}
+            
+            query = db.query(AgentLog).filter(AgentLog.created_at >= window_start)
+            if last_built_at:
+                query = query.filter(AgentLog.created_at >= last_built_at)
+            recent_logs = query.order_by(AgentLog.created_at.desc()).limit(1000).all()
             
             agent_docs = []
+            documents = []
+            ids = []
             for log in recent_logs:
                 agent_doc = {
                     'log_id': log.id,
@@ -299,24 +507,43 @@ class RAGSystem:
                 }
                 
                 # Create searchable text
-                searchable_text = f"""
-                Agent: {log.agent_type.value}
-                Action: {log.action}
-                Status: {log.status}
-                Execution Time: {log.execution_time_ms}ms
-                Date: {log.created_at}
-                Error: {log.error_message or 'None'}
-                """
-                
-                # Add to collection
-                self.agent_collection.add(
-                    documents=[searchable_text],
-                    metadatas=[agent_doc],
-                    ids=[f"agent_log_{log.id}"]
+                searchable_text = (
+                    f"Agent: {log.agent_type.value}\n"
+                    f"Action: {log.action}\n"
+                    f"Status: {log.status}\n"
+                    f"Execution Time: {log.execution_time_ms}ms\n"
+                    f"Date: {log.created_at}\n"
+                    f"Error: {log.error_message or 'None'}"
                 )
                 
+                documents.append(searchable_text)
+                ids.append(f"agent_log_{log.id}")
                 agent_docs.append(agent_doc)
             
+            # Sync the collection in a single batch off the event loop
+            embeddings = await asyncio.to_thread(
+                self._sync_collection,
+                db,
+                self.agent_collection,
+                documents,
+                agent_docs,
+                ids,
+                current_ids
+            )
+            
+            # Keep the binary codes used by search_agent_decisions in step
+            for log, embedding in zip(recent_logs, embeddings):
+                db.merge(AgentLogEmbeddingCode(
+                    log_id=log.id,
+                    code=np.packbits(np.asarray(embedding) > 0).tobytes()
+                ))
+            db.query(AgentLogEmbeddingCode).filter(
+                AgentLogEmbeddingCode.log_id.notin_(current_log_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+            
+            self._set_last_built_at(db, "agent_logs", build_started_at)
+            
             return agent_docs
             
         finally:
@@ -330,41 +557,40 @@ class RAGSystem:
     ) -> Dict[str, Any]:
         """Query the knowledge base for relevant information."""
         try:
-            results = {}
-            
-            if collection == "all" or collection == "products":
-                product_results = self.product_collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
-                results['products'] = self._format_query_results(product_results)
+            collections = {
+                'products': self.product_collection,
+                'sales': self.sales_collection,
+                'suppliers': self.supplier_collection,
+                'agents': self.agent_collection
+            }
+            if collection != "all":
+                collections = {
+                    name: coll for name, coll in collections.items() if name == collection
+                }
             
-            if collection == "all" or collection == "sales":
-                sales_results = self.sales_collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
-                results['sales'] = self._format_query_results(sales_results)
+            # Embed the query once and reuse it for every collection
+            query_embedding = self._embed(query)
             
-            if collection == "all" or collection == "suppliers":
-                supplier_results = self.supplier_collection.query(
-                    query_texts=[query],
-                    n_results=limit
+            query_results = await asyncio.gather(*(
+                asyncio.to_thread(
+                    coll.query,
+                    query_embeddings=[query_embedding],
+                    n_results=limit,
+                    include=["documents", "metadatas", "distances"]
                 )
-                results['suppliers'] = self._format_query_results(supplier_results)
+                for coll in collections.values()
+            ))
             
-            if collection == "all" or collection == "agents":
-                agent_results = self.agent_collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
-                results['agents'] = self._format_query_results(agent_results)
+            results = {
+                name: self._format_query_results(query_result)
+                for name, query_result in zip(collections, query_results)
+            }
             
             return {
                 'success': True,
                 'query': query,
                 'results': results,
-                'queried_at': datetime.utcnow().isoformat()
+                'queried_at': _now_iso()
             }
             
         except Exception as e:
@@ -372,7 +598,7 @@ class RAGSystem:
                 'success': False,
                 'error': str(e),
                 'query': query,
-                'queried_at': datetime.utcnow().isoformat()
+                'queried_at': _now_iso()
             }
     
     def _format_query_results(self, query_results) -> List[Dict[str, Any]]:
@@ -394,6 +620,49 @@ class RAGSystem:
         
         return formatted_results
     
+    def _search_agent_logs(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Find the agent logs nearest to the query by Hamming distance over binary codes."""
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                AgentLogEmbeddingCode.log_id, AgentLogEmbeddingCode.code
+            ).all()
+        finally:
+            db.close()
+        
+        if not rows:
+            return []
+        
+        codes = np.frombuffer(b"".join(code for _, code in rows), dtype=np.uint8)
+        codes = codes.reshape(len(rows), -1)
+        query_code = np.packbits(np.asarray(self._embed(query)) > 0)
+        distances = np.unpackbits(codes ^ query_code, axis=1).sum(axis=1)
+        nearest = np.argsort(distances, kind="stable")[:limit]
+        
+        ids = [f"agent_log_{rows[i][0]}" for i in nearest]
+        stored = self.agent_collection.get(ids=ids, include=["documents", "metadatas"])
+        stored_by_id = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(
+                stored['ids'], stored['documents'], stored['metadatas']
+            )
+        }
+        
+        n_bits = codes.shape[1] * 8
+        results = []
+        for i, doc_id in zip(nearest, ids):
+            if doc_id not in stored_by_id:
+                continue
+            document, metadata = stored_by_id[doc_id]
+            results.append({
+                'document': document,
+                'metadata': metadata,
+                'relevance_score': 1 - float(distances[i]) / n_bits,
+                'id': doc_id
+            })
+        
+        return results
+    
     async def get_product_insights(self, product_id: int) -> Dict[str, Any]:
         """Get comprehensive insights for a specific product."""
         try:
@@ -422,7 +691,7 @@ class RAGSystem:
                     'supplier_info': supplier_results.get('results', {}).get('suppliers', []),
                     'agent_decisions': agent_results.get('results', {}).get('agents', [])
                 },
-                'generated_at': datetime.utcnow().isoformat()
+                'generated_at': _now_iso()
             }
             
         except Exception as e:
@@ -430,7 +699,7 @@ class RAGSystem:
                 'success': False,
                 'error': str(e),
                 'product_id': product_id,
-                'generated_at': datetime.utcnow().isoformat()
+                'generated_at': _now_iso()
             }
     
     async def get_inventory_recommendations(self) -> Dict[str, Any]:
@@ -477,23 +746,24 @@ class RAGSystem:
                 'success': True,
                 'recommendations': recommendations,
                 'total_recommendations': len(recommendations),
-                'generated_at': datetime.utcnow().isoformat()
+                'generated_at': _now_iso()
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
-                'generated_at': datetime.utcnow().isoformat()
+                'generated_at': _now_iso()
             }
     
     async def search_agent_decisions(self, search_term: str) -> Dict[str, Any]:
         """Search through agent decision logs."""
         try:
-            results = await self.query_knowledge_base(search_term, "agents", 10)
+            agent_decisions = await asyncio.to_thread(
+                self._search_agent_logs, search_term, 10
+            )
             
             # Analyze patterns in agent decisions
-            agent_decisions = results.get('results', {}).get('agents', [])
             
             decision_patterns = {
                 'successful_actions': [],
@@ -501,6 +771,8 @@ class RAGSystem:
                 'common_errors': [],
                 'performance_metrics': {}
             }
+            # agent_type -> [total execution time, actions with a recorded time]
+            execution_totals = {}
             
             for decision in agent_decisions:
                 metadata = decision.get('metadata', {})
@@ -522,16 +794,24 @@ class RAGSystem:
                         'successful_actions': 0,
                         'avg_execution_time': 0
                     }
+                    execution_totals[agent_type] = [0, 0]
                 
                 metrics = decision_patterns['performance_metrics'][agent_type]
                 metrics['total_actions'] += 1
                 if status == 'success':
                     metrics['successful_actions'] += 1
                 
-                if metadata.get('execution_time_ms'):
-                    metrics['avg_execution_time'] = (
-                        (metrics['avg_execution_time'] * (metrics['total_actions'] - 1) + 
-                         metadata['execution_time_ms']) / metrics['total_actions']
+                execution_time = metadata.get('execution_time_ms')
+                if execution_time:
+                    totals = execution_totals[agent_type]
+                    totals[0] += execution_time
+                    totals[1] += 1
+            
+            # Average execution times once all decisions are counted
+            for agent_type, (total_time, timed_actions) in execution_totals.items():
+                if timed_actions:
+                    decision_patterns['performance_metrics'][agent_type]['avg_execution_time'] = (
+                        total_time / timed_actions
                     )
             
             return {
@@ -539,7 +819,7 @@ class RAGSystem:
                 'search_term': search_term,
                 'agent_decisions': agent_decisions,
                 'decision_patterns': decision_patterns,
-                'searched_at': datetime.utcnow().isoformat()
+                'searched_at': _now_iso()
             }
             
         except Exception as e:
@@ -547,5 +827,5 @@ class RAGSystem:
                 'success': False,
                 'error': str(e),
                 'search_term': search_term,
-                'searched_at': datetime.utcnow().isoformat()
+                'searched_at': _now_iso()
             }
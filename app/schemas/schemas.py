@@ -1,7 +1,7 @@
 """Pydantic schemas for API requests and responses."""
 
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from app.models.models import ProductCategory, OrderStatus, ShipmentStatus, AgentType
 
@@ -43,8 +43,7 @@ class Product(ProductBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Inventory Schemas
@@ -71,8 +70,7 @@ class Inventory(InventoryBase):
     available_stock: int
     last_updated: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InventoryWithProduct(Inventory):
@@ -82,13 +80,12 @@ class InventoryWithProduct(Inventory):
 # Customer Schemas
 class CustomerBase(BaseModel):
     name: str
-    email: EmailStr
     phone: Optional[str] = None
     address: Optional[str] = None
 
 
 class CustomerCreate(CustomerBase):
-    pass
+    email: EmailStr
 
 
 class CustomerUpdate(BaseModel):
@@ -99,12 +96,12 @@ class CustomerUpdate(BaseModel):
 
 
 class Customer(CustomerBase):
+    email: str  # Validated on write, so not re-checked on every response
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Order Schemas
@@ -124,8 +121,7 @@ class OrderItem(OrderItemBase):
     total_price: float
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderItemWithProduct(OrderItem):
@@ -160,8 +156,7 @@ class Order(OrderBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrderWithDetails(Order):
@@ -172,7 +167,6 @@ class OrderWithDetails(Order):
 # Supplier Schemas
 class SupplierBase(BaseModel):
     name: str
-    email: EmailStr
     phone: Optional[str] = None
     address: Optional[str] = None
     contact_person: Optional[str] = None
@@ -182,7 +176,7 @@ class SupplierBase(BaseModel):
 
 
 class SupplierCreate(SupplierBase):
-    pass
+    email: EmailStr
 
 
 class SupplierUpdate(BaseModel):
@@ -198,13 +192,13 @@ class SupplierUpdate(BaseModel):
 
 
 class Supplier(SupplierBase):
+    email: str
     id: int
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Supplier Product Schemas
@@ -235,8 +229,7 @@ class SupplierProduct(SupplierProductBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SupplierProductWithDetails(SupplierProduct):
@@ -273,8 +266,7 @@ class Shipment(ShipmentBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ShipmentWithSupplier(Shipment):
@@ -299,8 +291,7 @@ class SalesTransaction(SalesTransactionBase):
     transaction_date: datetime
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Procurement Transaction Schemas
@@ -322,8 +313,7 @@ class ProcurementTransaction(ProcurementTransactionBase):
     transaction_date: datetime
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Agent Log Schemas
@@ -345,8 +335,7 @@ class AgentLog(AgentLogBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Agent Interaction Schemas
@@ -367,8 +356,7 @@ class AgentInteraction(AgentInteractionBase):
     log_id: Optional[int] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Dashboard and Analytics Schemas
@@ -399,6 +387,16 @@ class SupplierPerformanceMetrics(BaseModel):
     overall_score: float
 
 
+# Agent Workflow Schemas
+class WorkflowRequest(BaseModel):
+    name: str
+    args: Dict[str, Any] = {}
+
+
+class WorkflowBatchRequest(BaseModel):
+    workflows: List[WorkflowRequest]
+
+
 # API Response Schemas
 class MessageResponse(BaseModel):
     message: str
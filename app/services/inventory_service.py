@@ -1,11 +1,37 @@
 """Inventory service for handling inventory business logic."""
 
+from sqlalchemy import and_, bindparam, case, func, lambda_stmt, select, update
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from typing import List, Optional
 from datetime import datetime, timedelta
 from app.models.models import Inventory as InventoryModel, Product, SalesTransaction
-from app.schemas.schemas import InventoryUpdate, InventoryWithProduct, InventoryAlert
-from app.database.database import SessionLocal
+from app.schemas.schemas import (
+    InventoryUpdate, InventoryWithProduct, InventoryAlert, Product as ProductSchema
+)
+
+# Compiled once so a whole page of rows is validated in a single call
+_INVENTORY_LIST_ADAPTER = TypeAdapter(List[InventoryWithProduct])
+
+# Table columns selected for list responses, in schema field order
+_INVENTORY_FIELDS = tuple(name for name in InventoryWithProduct.model_fields if name != "product")
+_PRODUCT_FIELDS = tuple(ProductSchema.model_fields)
+_INVENTORY_COLUMNS = tuple(InventoryModel.__table__.c[name] for name in _INVENTORY_FIELDS)
+_PRODUCT_COLUMNS = tuple(Product.__table__.c[name] for name in _PRODUCT_FIELDS)
+
+# Per-product lookups run on every order line, so their compiled SQL is cached
+_INVENTORY_BY_PRODUCT_ID = lambda_stmt(
+    lambda: select(InventoryModel).where(
+        InventoryModel.product_id == bindparam("product_id")
+    )
+)
+_INVENTORY_WITH_PRODUCT_BY_PRODUCT_ID = lambda_stmt(
+    lambda: select(InventoryModel, Product).join_from(
+        InventoryModel, Product, InventoryModel.product_id == Product.id
+    ).where(
+        InventoryModel.product_id == bindparam("product_id")
+    )
+)
 
 
 class InventoryService:
@@ -14,234 +40,238 @@ class InventoryService:
     def __init__(self, db: Session):
         self.db = db
     
-    async def get_all_inventory(self, skip: int = 0, limit: int = 100) -> List[InventoryWithProduct]:
+    def get_all_inventory(self, skip: int = 0, limit: int = 100) -> List[InventoryWithProduct]:
         """Get all inventory items with product details."""
-        inventory_items = self.db.query(InventoryModel, Product).join(
-            Product, InventoryModel.product_id == Product.id
-        ).offset(skip).limit(limit).all()
-        
-        result = []
-        for inventory, product in inventory_items:
-            inventory_with_product = InventoryWithProduct.from_orm(inventory)
-            inventory_with_product.product = product
-            result.append(inventory_with_product)
+        # Select plain column tuples so no ORM objects are built
+        rows = self.db.execute(
+            select(*_INVENTORY_COLUMNS, *_PRODUCT_COLUMNS).join_from(
+                InventoryModel, Product, InventoryModel.product_id == Product.id
+            ).offset(skip).limit(limit)
+        ).all()
         
-        return result
+        # Inventory and product share column names, so split each row by position
+        split = len(_INVENTORY_COLUMNS)
+        inventory_items = [
+            {
+                **dict(zip(_INVENTORY_FIELDS, row[:split])),
+                'product': dict(zip(_PRODUCT_FIELDS, row[split:]))
+            }
+            for row in rows
+        ]
+        
+        return _INVENTORY_LIST_ADAPTER.validate_python(inventory_items)
     
-    async def get_inventory_by_product_id(self, product_id: int) -> Optional[InventoryWithProduct]:
+    def get_inventory_by_product_id(self, product_id: int) -> Optional[InventoryWithProduct]:
         """Get inventory for a specific product."""
-        inventory = self.db.query(InventoryModel, Product).join(
-            Product, InventoryModel.product_id == Product.id
-        ).filter(InventoryModel.product_id == product_id).first()
+        inventory = self.db.execute(
+            _INVENTORY_WITH_PRODUCT_BY_PRODUCT_ID, {"product_id": product_id}
+        ).first()
         
         if not inventory:
             return None
         
         inventory_model, product = inventory
-        inventory_with_product = InventoryWithProduct.from_orm(inventory_model)
+        inventory_with_product = InventoryWithProduct.model_validate(inventory_model)
         inventory_with_product.product = product
         
         return inventory_with_product
     
-    async def update_inventory(self, product_id: int, inventory_update: InventoryUpdate) -> Optional[InventoryModel]:
+    def update_inventory(self, product_id: int, inventory_update: InventoryUpdate) -> Optional[InventoryModel]:
         """Update inventory for a specific product."""
-        inventory = self.db.query(InventoryModel).filter(
-            InventoryModel.product_id == product_id
-        ).first()
-        
-        if not inventory:
-            return None
-        
-        # Update fields
-        update_data = inventory_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(inventory, field, value)
-        
-        # Recalculate available stock
-        inventory.available_stock = inventory.current_stock - inventory.reserved_stock
-        
-        self.db.commit()
-        self.db.refresh(inventory)
-        
-        return inventory
+        # Write only the fields that were sent, in a single UPDATE
+        update_data = inventory_update.model_dump(exclude_unset=True)
+        if update_data:
+            result = self.db.execute(
+                update(InventoryModel).where(
+                    InventoryModel.product_id == product_id
+                ).values(
+                    **update_data,
+                    last_updated=func.now()
+                )
+            )
+            self.db.commit()
+            
+            if result.rowcount == 0:
+                return None
+        
+        # Overwrite any stale copy already in the session
+        return self.db.execute(
+            _INVENTORY_BY_PRODUCT_ID,
+            {"product_id": product_id},
+            execution_options={"populate_existing": True}
+        ).scalar_one_or_none()
     
-    async def reduce_inventory(self, product_id: int, quantity: int, reason: str = "") -> bool:
-        """Reduce inventory for a product."""
-        inventory = self.db.query(InventoryModel).filter(
-            InventoryModel.product_id == product_id
-        ).first()
-        
-        if not inventory:
-            return False
-        
-        if inventory.available_stock < quantity:
-            return False
-        
-        # Reduce current stock
-        inventory.current_stock -= quantity
-        inventory.available_stock = inventory.current_stock - inventory.reserved_stock
-        inventory.last_updated = datetime.utcnow()
-        
-        self.db.commit()
-        
-        return True
+    def reduce_inventory(self, product_id: int, quantity: int, reason: str = "", commit: bool = True) -> bool:
+        """Reduce inventory for a product; returns False if not enough stock is available."""
+        # The WHERE clause enforces availability, so the check and write are atomic
+        result = self.db.execute(
+            update(InventoryModel).where(
+                InventoryModel.product_id == product_id,
+                InventoryModel.available_stock >= quantity
+            ).values(
+                current_stock=InventoryModel.current_stock - quantity,
+                last_updated=func.now()
+            )
+        )
+        if commit:
+            self.db.commit()
+        
+        return result.rowcount == 1
     
-    async def increase_inventory(self, product_id: int, quantity: int, reason: str = "") -> bool:
+    def increase_inventory(self, product_id: int, quantity: int, reason: str = "") -> bool:
         """Increase inventory for a product."""
-        inventory = self.db.query(InventoryModel).filter(
-            InventoryModel.product_id == product_id
-        ).first()
-        
-        if not inventory:
-            return False
-        
-        # Increase current stock
-        inventory.current_stock += quantity
-        inventory.available_stock = inventory.current_stock - inventory.reserved_stock
-        inventory.last_updated = datetime.utcnow()
-        
+        result = self.db.execute(
+            update(InventoryModel).where(
+                InventoryModel.product_id == product_id
+            ).values(
+                current_stock=InventoryModel.current_stock + quantity,
+                last_updated=func.now()
+            )
+        )
         self.db.commit()
         
-        return True
+        return result.rowcount == 1
     
-    async def reserve_inventory(self, product_id: int, quantity: int) -> bool:
+    def reserve_inventory(self, product_id: int, quantity: int) -> bool:
         """Reserve inventory for a pending order."""
-        inventory = self.db.query(InventoryModel).filter(
-            InventoryModel.product_id == product_id
-        ).first()
-        
-        if not inventory:
-            return False
-        
-        if inventory.available_stock < quantity:
-            return False
-        
-        # Reserve stock
-        inventory.reserved_stock += quantity
-        inventory.available_stock = inventory.current_stock - inventory.reserved_stock
-        
+        result = self.db.execute(
+            update(InventoryModel).where(
+                InventoryModel.product_id == product_id,
+                InventoryModel.available_stock >= quantity
+            ).values(
+                reserved_stock=InventoryModel.reserved_stock + quantity
+            )
+        )
         self.db.commit()
         
-        return True
+        return result.rowcount == 1
     
-    async def release_reserved_inventory(self, product_id: int, quantity: int) -> bool:
+    def release_reserved_inventory(self, product_id: int, quantity: int) -> bool:
         """Release reserved inventory."""
-        inventory = self.db.query(InventoryModel).filter(
-            InventoryModel.product_id == product_id
-        ).first()
-        
-        if not inventory:
-            return False
-        
-        # Release reserved stock
-        inventory.reserved_stock = max(0, inventory.reserved_stock - quantity)
-        inventory.available_stock = inventory.current_stock - inventory.reserved_stock
-        
+        # Never release more than is reserved
+        released_reserved_stock = case(
+            (InventoryModel.reserved_stock < quantity, 0),
+            else_=InventoryModel.reserved_stock - quantity
+        )
+        result = self.db.execute(
+            update(InventoryModel).where(
+                InventoryModel.product_id == product_id
+            ).values(
+                reserved_stock=released_reserved_stock
+            )
+        )
         self.db.commit()
         
-        return True
+        return result.rowcount == 1
     
-    async def get_low_stock_alerts(self) -> List[InventoryAlert]:
+    def get_low_stock_alerts(self) -> List[InventoryAlert]:
         """Get low stock alerts."""
-        inventory_items = self.db.query(InventoryModel, Product).join(
+        alert_rows = self.db.query(
+            InventoryModel.product_id,
+            Product.name,
+            InventoryModel.current_stock,
+            InventoryModel.reorder_point,
+            case(
+                (InventoryModel.current_stock == 0, "out_of_stock"),
+                else_="low_stock"
+            ).label("alert_type")
+        ).join(
             Product, InventoryModel.product_id == Product.id
+        ).filter(
+            InventoryModel.current_stock <= InventoryModel.safety_stock
         ).all()
         
-        alerts = []
-        for inventory, product in inventory_items:
-            if inventory.current_stock <= inventory.safety_stock:
-                alert_type = "out_of_stock" if inventory.current_stock == 0 else "low_stock"
-                
-                alerts.append(InventoryAlert(
-                    product_id=product.id,
-                    product_name=product.name,
-                    current_stock=inventory.current_stock,
-                    reorder_point=inventory.reorder_point,
-                    alert_type=alert_type
-                ))
-        
-        return alerts
+        return [
+            InventoryAlert.model_construct(
+                product_id=product_id,
+                product_name=product_name,
+                current_stock=current_stock,
+                reorder_point=reorder_point,
+                alert_type=alert_type
+            )
+            for product_id, product_name, current_stock, reorder_point, alert_type in alert_rows
+        ]
     
-    async def get_sales_trends(self, days: int = 30) -> dict:
+    def get_sales_trends(self, days: int = 30) -> dict:
         """Get sales trends for the specified period."""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Get sales transactions for the period
-        sales_data = self.db.query(SalesTransaction, Product).join(
-            Product, SalesTransaction.product_id == Product.id
+        # Aggregate sales per product for the period in the database
+        total_revenue = func.sum(SalesTransaction.total_amount)
+        product_sales = self.db.query(
+            Product.id,
+            Product.name,
+            func.sum(SalesTransaction.quantity),
+            total_revenue,
+            func.count(SalesTransaction.id)
+        ).join(
+            SalesTransaction, SalesTransaction.product_id == Product.id
         ).filter(
-            SalesTransaction.transaction_date >= start_date,
-            SalesTransaction.transaction_date <= end_date
+            SalesTransaction.transaction_date.between(start_date, end_date)
+        ).group_by(
+            Product.id, Product.name
+        ).order_by(
+            total_revenue.desc()
         ).all()
         
-        # Group by product
-        product_sales = {}
-        for transaction, product in sales_data:
-            if product.id not in product_sales:
-                product_sales[product.id] = {
-                    'product_name': product.name,
-                    'total_quantity': 0,
-                    'total_revenue': 0,
-                    'transaction_count': 0
-                }
-            
-            product_sales[product.id]['total_quantity'] += transaction.quantity
-            product_sales[product.id]['total_revenue'] += transaction.total_amount
-            product_sales[product.id]['transaction_count'] += 1
-        
-        # Calculate trends
-        trends = []
-        for product_id, sales in product_sales.items():
-            avg_daily_sales = sales['total_quantity'] / days
-            avg_daily_revenue = sales['total_revenue'] / days
-            
-            trends.append({
+        # Calculate trends, already sorted by total revenue
+        trends = [
+            {
                 'product_id': product_id,
-                'product_name': sales['product_name'],
-                'total_quantity': sales['total_quantity'],
-                'total_revenue': sales['total_revenue'],
-                'transaction_count': sales['transaction_count'],
-                'avg_daily_sales': avg_daily_sales,
-                'avg_daily_revenue': avg_daily_revenue
-            })
-        
-        # Sort by total revenue
-        trends.sort(key=lambda x: x['total_revenue'], reverse=True)
+                'product_name': product_name,
+                'total_quantity': total_quantity,
+                'total_revenue': revenue,
+                'transaction_count': transaction_count,
+                'avg_daily_sales': total_quantity / days,
+                'avg_daily_revenue': revenue / days
+            }
+            for product_id, product_name, total_quantity, revenue, transaction_count in product_sales
+        ]
         
         return {
             'period_days': days,
-            'start_date': start_date.isoformat(),
-            'end_date': end_date.isoformat(),
+            'start_date': start_date,
+            'end_date': end_date,
             'total_products': len(trends),
             'trends': trends
         }
     
-    async def get_inventory_performance(self) -> dict:
+    def get_inventory_performance(self) -> dict:
         """Get inventory performance metrics."""
-        # Get all inventory items
-        inventory_items = self.db.query(InventoryModel, Product).join(
+        is_low_or_out = InventoryModel.current_stock <= InventoryModel.safety_stock
+        
+        # Count stock levels and sum inventory value in a single query
+        (
+            total_products,
+            out_of_stock_count,
+            low_stock_count,
+            overstock_count,
+            total_inventory_value
+        ) = self.db.query(
+            func.count(InventoryModel.id),
+            func.sum(case(
+                (and_(is_low_or_out, InventoryModel.current_stock == 0), 1),
+                else_=0
+            )),
+            func.sum(case(
+                (and_(is_low_or_out, InventoryModel.current_stock != 0), 1),
+                else_=0
+            )),
+            func.sum(case(
+                (and_(~is_low_or_out, InventoryModel.current_stock > InventoryModel.maximum_stock), 1),
+                else_=0
+            )),
+            func.sum(InventoryModel.current_stock * Product.cost_price)
+        ).join(
             Product, InventoryModel.product_id == Product.id
-        ).all()
-        
-        total_products = len(inventory_items)
-        low_stock_count = 0
-        out_of_stock_count = 0
-        overstock_count = 0
-        total_inventory_value = 0
+        ).one()
         
-        for inventory, product in inventory_items:
-            # Check stock levels
-            if inventory.current_stock <= inventory.safety_stock:
-                if inventory.current_stock == 0:
-                    out_of_stock_count += 1
-                else:
-                    low_stock_count += 1
-            elif inventory.current_stock > inventory.maximum_stock:
-                overstock_count += 1
-            
-            # Calculate inventory value
-            total_inventory_value += inventory.current_stock * product.cost_price
+        # SUM over no rows is NULL
+        out_of_stock_count = out_of_stock_count or 0
+        low_stock_count = low_stock_count or 0
+        overstock_count = overstock_count or 0
+        total_inventory_value = total_inventory_value or 0
         
         # Calculate performance metrics
         stock_availability = ((total_products - out_of_stock_count) / total_products * 100) if total_products > 0 else 0
@@ -255,5 +285,5 @@ class InventoryService:
             'stock_availability_percentage': stock_availability,
             'optimal_stock_percentage': optimal_stock_level,
             'total_inventory_value': total_inventory_value,
-            'generated_at': datetime.utcnow().isoformat()
+            'generated_at': datetime.utcnow()
         }
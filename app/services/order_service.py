@@ -1,12 +1,52 @@
 """Order service for handling order business logic."""
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, selectinload
+from pydantic import TypeAdapter
 from typing import List, Optional
 from datetime import datetime
-import uuid
-from app.models.models import Order as OrderModel, OrderItem as OrderItemModel, Customer as CustomerModel
-from app.schemas.schemas import OrderCreate, OrderUpdate, Order, OrderWithDetails
-from app.database.database import SessionLocal
+import secrets
+from app.models.models import Order as OrderModel, OrderItem as OrderItemModel
+from app.schemas.schemas import (
+    OrderCreate, OrderUpdate, Order, OrderWithDetails, OrderItemWithProduct,
+    Customer as CustomerSchema, Product as ProductSchema
+)
+
+# Field names copied from ORM rows when building trusted responses
+_ORDER_FIELDS = tuple(Order.model_fields)
+_CUSTOMER_FIELDS = tuple(CustomerSchema.model_fields)
+_ORDER_ITEM_FIELDS = tuple(name for name in OrderItemWithProduct.model_fields if name != "product")
+_PRODUCT_FIELDS = tuple(ProductSchema.model_fields)
+
+# Compiled once so a whole page of rows is validated in a single call
+_ORDER_LIST_ADAPTER = TypeAdapter(List[Order])
+
+# Table columns selected for list responses
+_ORDER_COLUMNS = tuple(OrderModel.__table__.c[name] for name in _ORDER_FIELDS)
+
+
+def _fields_from_row(row, field_names) -> dict:
+    """Copy the named attributes off an ORM row."""
+    return {name: getattr(row, name) for name in field_names}
+
+
+def _order_with_details_from_row(order: OrderModel) -> OrderWithDetails:
+    """Build the detailed response schema from an order with its relationships loaded."""
+    return OrderWithDetails.model_construct(
+        **_fields_from_row(order, _ORDER_FIELDS),
+        customer=CustomerSchema.model_construct(
+            **_fields_from_row(order.customer, _CUSTOMER_FIELDS)
+        ),
+        order_items=[
+            OrderItemWithProduct.model_construct(
+                **_fields_from_row(item, _ORDER_ITEM_FIELDS),
+                product=ProductSchema.model_construct(
+                    **_fields_from_row(item.product, _PRODUCT_FIELDS)
+                )
+            )
+            for item in order.order_items
+        ]
+    )
 
 
 class OrderService:
@@ -15,14 +55,24 @@ class OrderService:
     def __init__(self, db: Session):
         self.db = db
     
-    async def create_order(self, order_data: OrderCreate) -> Order:
+    def create_order(self, order_data: OrderCreate) -> Order:
         """Create a new order."""
         try:
             # Generate order number
-            order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{str(uuid.uuid4())[:8].upper()}"
+            order_number = f"ORD-{datetime.utcnow():%Y%m%d%H%M%S}-{secrets.token_hex(4).upper()}"
             
-            # Calculate total amount
-            total_amount = sum(item.quantity * item.unit_price for item in order_data.items)
+            # Build order item rows and the order total in one pass
+            total_amount = 0
+            order_items = []
+            for item_data in order_data.items:
+                total_price = item_data.quantity * item_data.unit_price
+                total_amount += total_price
+                order_items.append({
+                    'product_id': item_data.product_id,
+                    'quantity': item_data.quantity,
+                    'unit_price': item_data.unit_price,
+                    'total_price': total_price
+                })
             
             # Create order
             order = OrderModel(
@@ -35,74 +85,79 @@ class OrderService:
             self.db.add(order)
             self.db.flush()  # Get the order ID
             
-            # Create order items
-            for item_data in order_data.items:
-                order_item = OrderItemModel(
-                    order_id=order.id,
-                    product_id=item_data.product_id,
-                    quantity=item_data.quantity,
-                    unit_price=item_data.unit_price,
-                    total_price=item_data.quantity * item_data.unit_price
-                )
-                self.db.add(order_item)
+            # Create order items with a single multi-row INSERT
+            if order_items:
+                for order_item in order_items:
+                    order_item['order_id'] = order.id
+                self.db.execute(insert(OrderItemModel), order_items)
             
             self.db.commit()
             self.db.refresh(order)
             
-            return Order.from_orm(order)
+            return Order.model_validate(order)
             
         except Exception as e:
             self.db.rollback()
             raise e
     
-    async def get_order_by_id(self, order_id: int) -> Optional[OrderWithDetails]:
+    def get_order_by_id(self, order_id: int) -> Optional[OrderWithDetails]:
         """Get order by ID with all details."""
-        order = self.db.query(OrderModel).filter(OrderModel.id == order_id).first()
+        order = self.db.get(
+            OrderModel,
+            order_id,
+            options=[
+                selectinload(OrderModel.customer),
+                selectinload(OrderModel.order_items).selectinload(OrderItemModel.product)
+            ]
+        )
         
         if not order:
             return None
         
-        return OrderWithDetails.from_orm(order)
+        return _order_with_details_from_row(order)
     
-    async def get_orders(self, skip: int = 0, limit: int = 100) -> List[Order]:
+    def get_orders(self, skip: int = 0, limit: int = 100) -> List[Order]:
         """Get orders with pagination."""
-        orders = self.db.query(OrderModel).offset(skip).limit(limit).all()
-        return [Order.from_orm(order) for order in orders]
+        # Select plain column mappings so no ORM objects are built
+        orders = self.db.execute(
+            select(*_ORDER_COLUMNS).offset(skip).limit(limit)
+        ).mappings().all()
+        return _ORDER_LIST_ADAPTER.validate_python([dict(order) for order in orders])
     
-    async def get_orders_by_customer_id(self, customer_id: int, skip: int = 0, limit: int = 50) -> List[Order]:
+    def get_orders_by_customer_id(self, customer_id: int, skip: int = 0, limit: int = 50) -> List[Order]:
         """Get orders for a specific customer."""
         orders = self.db.query(OrderModel).filter(
             OrderModel.customer_id == customer_id
         ).offset(skip).limit(limit).all()
         
-        return [Order.from_orm(order) for order in orders]
+        return _ORDER_LIST_ADAPTER.validate_python(orders, from_attributes=True)
     
-    async def update_order(self, order_id: int, order_update: OrderUpdate) -> Optional[Order]:
+    def update_order(self, order_id: int, order_update: OrderUpdate) -> Optional[Order]:
         """Update an existing order."""
-        order = self.db.query(OrderModel).filter(OrderModel.id == order_id).first()
+        order = self.db.get(OrderModel, order_id)
         
         if not order:
             return None
         
         # Update fields
-        update_data = order_update.dict(exclude_unset=True)
+        update_data = order_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(order, field, value)
         
         self.db.commit()
         self.db.refresh(order)
         
-        return Order.from_orm(order)
+        return Order.model_validate(order)
     
-    async def process_payment(self, order_id: int, payment_data: dict) -> dict:
+    def process_payment(self, order_id: int, payment_data: dict) -> dict:
         """Process payment for an order (fake payment gateway)."""
-        order = self.db.query(OrderModel).filter(OrderModel.id == order_id).first()
+        order = self.db.get(OrderModel, order_id)
         
         if not order:
             raise ValueError("Order not found")
         
         # Simulate payment processing
-        payment_reference = f"PAY-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{str(uuid.uuid4())[:8].upper()}"
+        payment_reference = f"PAY-{datetime.utcnow():%Y%m%d%H%M%S}-{secrets.token_hex(4).upper()}"
         
         # Update order status
         order.status = "confirmed"
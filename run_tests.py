@@ -4,28 +4,40 @@
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
-def run_command(command, description):
-    """Run a command and handle errors."""
-    print(f"\n{'='*60}")
-    print(f"Running: {description}")
-    print(f"Command: {command}")
-    print('='*60)
-    
+def run_command(command, description, cwd=None):
+    """Run a command, streaming its output as it is produced."""
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print("✅ SUCCESS")
-        if result.stdout:
-            print("Output:", result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print("❌ FAILED")
-        print("Error:", e.stderr)
-        if e.stdout:
-            print("Output:", e.stdout)
-        return False
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+    except OSError as e:
+        print(f"[{description}] {e}")
+        return description, command, False
+    
+    for line in process.stdout:
+        sys.stdout.write(f"[{description}] {line}")
+    process.wait()
+    
+    return description, command, process.returncode == 0
+
+
+def run_lane(lane):
+    """Run a sequence of commands one after another."""
+    return [run_command(*job) for job in lane]
+
+
+def print_result(description, command, success):
+    """Print the outcome of a command."""
+    print(f"{'✅' if success else '❌'} {description}: {' '.join(command)}")
 
 
 def main():
@@ -37,50 +49,50 @@ def main():
     project_root = Path(__file__).parent
     os.chdir(project_root)
     
-    tests_passed = 0
-    total_tests = 0
-    
-    # 1. Backend Tests
-    total_tests += 1
-    if run_command("python -m pytest tests/ -v --tb=short", "Backend Unit Tests"):
-        tests_passed += 1
+    # Each lane runs in parallel with the others; commands within a lane run
+    # in order. Database initialization and the pytest runs share the app
+    # database the agents write to, so they stay in one lane, init first.
+    lanes = [
+        [
+            # 1. Database Initialization Test
+            (["python", "app/database/init_db.py"], "Database Initialization"),
+            # 2. Backend Tests
+            (["python", "-m", "pytest", "tests/", "-v", "--tb=short"], "Backend Unit Tests"),
+            # 3. API Tests
+            (["python", "-m", "pytest", "tests/test_api.py", "-v", "--tb=short"], "API Integration Tests"),
+            # 4. Agent Tests
+            (["python", "-m", "pytest", "tests/test_agents.py", "-v", "--tb=short"], "AI Agent Tests"),
+            # 5. Slow Tests (excluded from the default pytest run)
+            (["python", "-m", "pytest", "tests/", "-m", "slow", "-v", "--tb=short"], "Slow Tests"),
+        ],
+        # 6. Code Quality Checks
+        [(["python", "-m", "flake8", "app/", "--max-line-length=100", "--ignore=E203,W503"], "Code Style Check")],
+        # 7. Type Checking
+        [(["python", "-m", "mypy", "app/", "--ignore-missing-imports"], "Type Checking")],
+        # 8. Security Check
+        [(["python", "-m", "bandit", "-r", "app/", "-f", "json", "-o", "security_report.json"], "Security Analysis")],
+    ]
     
-    # 2. API Tests
-    total_tests += 1
-    if run_command("python -m pytest tests/test_api.py -v --tb=short", "API Integration Tests"):
-        tests_passed += 1
-    
-    # 3. Agent Tests
-    total_tests += 1
-    if run_command("python -m pytest tests/test_agents.py -v --tb=short", "AI Agent Tests"):
-        tests_passed += 1
-    
-    # 4. Code Quality Checks
-    total_tests += 1
-    if run_command("python -m flake8 app/ --max-line-length=100 --ignore=E203,W503", "Code Style Check"):
-        tests_passed += 1
-    
-    # 5. Type Checking
-    total_tests += 1
-    if run_command("python -m mypy app/ --ignore-missing-imports", "Type Checking"):
-        tests_passed += 1
-    
-    # 6. Security Check
-    total_tests += 1
-    if run_command("python -m bandit -r app/ -f json -o security_report.json", "Security Analysis"):
-        tests_passed += 1
-    
-    # 7. Database Initialization Test
-    total_tests += 1
-    if run_command("python app/database/init_db.py", "Database Initialization"):
-        tests_passed += 1
-    
-    # 8. Frontend Tests (if available)
+    # 9. Frontend Tests (if available)
     frontend_path = Path("frontend")
     if frontend_path.exists():
-        total_tests += 1
-        if run_command("cd frontend && npm test -- --watchAll=false", "Frontend Tests"):
-            tests_passed += 1
+        lanes.append([(["npm", "test", "--", "--watchAll=false"], "Frontend Tests", frontend_path)])
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        lane_results = list(executor.map(run_lane, lanes))
+    
+    # Print results in the original order once everything has finished
+    print(f"\n{'='*60}")
+    print("🧪 RESULTS")
+    print('='*60)
+    tests_passed = 0
+    total_tests = 0
+    for results in lane_results:
+        for result in results:
+            print_result(*result)
+            total_tests += 1
+            if result[2]:
+                tests_passed += 1
     
     # Summary
     print(f"\n{'='*60}")
@@ -1,14 +1,68 @@
 #!/usr/bin/env python3
 """System startup script for MiniMart AI Inventory Management System."""
 
-import subprocess
+import asyncio
+import signal
 import sys
 import os
 import time
-import requests
+from functools import lru_cache
+from importlib.metadata import packages_distributions
+import httpx
 from pathlib import Path
 
 
+async def _wait_for_http(client, url, deadline_s, cancelled=None):
+    """Poll a URL with exponential backoff until it answers 200 or the deadline passes."""
+    cancelled = cancelled or asyncio.Event()
+    delay = 0.05
+    t_end = time.monotonic() + deadline_s
+    while time.monotonic() < t_end and not cancelled.is_set():
+        try:
+            response = await client.get(url, timeout=0.25)
+            if response.status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        
+        # Back off, waking early if the probe is cancelled
+        try:
+            await asyncio.wait_for(cancelled.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, 1.0)
+    
+    return False
+
+
+@lru_cache(maxsize=None)
+def _installed_packages():
+    """Return the top-level module names of every installed distribution."""
+    return frozenset(packages_distributions())
+
+
+# Parsed .env files keyed by (path, mtime), so unchanged files are not re-read
+_env_cache = {}
+
+
+def _read_env(env_file):
+    """Parse KEY=VALUE lines from an env file, ignoring blanks and comments."""
+    key = (env_file, os.stat(env_file).st_mtime_ns)
+    if key not in _env_cache:
+        env = {}
+        with open(env_file) as f:
+            for line in f.read().splitlines():
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                name, value = line.split('=', 1)
+                env[name.strip()] = value.strip()
+        _env_cache.clear()
+        _env_cache[key] = env
+    
+    return _env_cache[key]
+
+
 def check_dependencies():
     """Check if required dependencies are installed."""
     print("🔍 Checking dependencies...")
@@ -18,12 +72,9 @@ def check_dependencies():
         'openai', 'pandas', 'numpy', 'statsmodels', 'chromadb'
     ]
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # One pass over installed metadata, without running any (often slow) imports
+    installed = _installed_packages()
+    missing_packages = [package for package in required_packages if package not in installed]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
@@ -38,8 +89,8 @@ def check_environment():
     """Check environment configuration."""
     print("🔍 Checking environment configuration...")
     
-    env_file = Path(".env")
-    if not env_file.exists():
+    env_file = ".env"
+    if not os.path.isfile(env_file):
         print("❌ .env file not found")
         print("Please copy env.example to .env and configure it")
         return False
@@ -49,12 +100,11 @@ def check_environment():
         'DATABASE_URL', 'OPENAI_API_KEY', 'SECRET_KEY'
     ]
     
-    missing_vars = []
-    with open(env_file) as f:
-        content = f.read()
-        for var in required_vars:
-            if f"{var}=" not in content or f"{var}=your_" in content:
-                missing_vars.append(var)
+    env = _read_env(env_file)
+    missing_vars = [
+        var for var in required_vars
+        if var not in env or env[var].startswith('your_')
+    ]
     
     if missing_vars:
         print(f"❌ Missing or unconfigured environment variables: {', '.join(missing_vars)}")
@@ -69,101 +119,130 @@ def initialize_database():
     print("🗄️  Initializing database...")
     
     try:
-        result = subprocess.run(
-            ["python", "app/database/init_db.py"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        # Run in-process rather than paying for a second interpreter start-up
+        from app.database.init_db import init_database
+        init_database()
         print("✅ Database initialized successfully")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Database initialization failed: {e.stderr}")
+    except Exception as e:
+        print(f"❌ Database initialization failed: {e}")
         return False
 
 
-def start_backend():
+async def start_backend():
     """Start the backend server."""
     print("🚀 Starting backend server...")
     
     try:
         # Start backend in background
-        backend_process = subprocess.Popen([
-            "uvicorn", "app.main:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8000", 
+        return await asyncio.create_subprocess_exec(
+            "uvicorn", "app.main:app",
+            "--host", "0.0.0.0",
+            "--port", "8000",
             "--reload"
-        ])
-        
-        # Wait for backend to start
-        print("⏳ Waiting for backend to start...")
-        for i in range(30):  # Wait up to 30 seconds
-            try:
-                response = requests.get("http://localhost:8000/health", timeout=1)
-                if response.status_code == 200:
-                    print("✅ Backend server is running on http://localhost:8000")
-                    return backend_process
-            except requests.exceptions.RequestException:
-                pass
-            time.sleep(1)
-        
-        print("❌ Backend server failed to start")
-        backend_process.terminate()
-        return None
+        )
         
     except Exception as e:
         print(f"❌ Failed to start backend: {e}")
         return None
 
 
-def start_frontend():
-    """Start the frontend development server."""
-    print("🎨 Starting frontend server...")
+async def _ensure_node_modules(frontend_path):
+    """Install frontend dependencies if needed, streaming npm's output."""
+    if os.path.isdir(os.path.join(frontend_path, "node_modules")):
+        return True
     
-    frontend_path = Path("frontend")
-    if not frontend_path.exists():
+    print("📦 Installing frontend dependencies...")
+    install_process = await asyncio.create_subprocess_exec(
+        "npm", "install",
+        cwd=frontend_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    
+    try:
+        # Drain output as it arrives so the pipe never fills
+        async for line in install_process.stdout:
+            print(line.decode(), end="")
+        
+        return await install_process.wait() == 0
+    except asyncio.CancelledError:
+        await _stop_process(install_process)
+        raise
+
+
+async def start_frontend(client, frontend_path, npm_task, backend_failed):
+    """Start the frontend development server once its dependencies are installed."""
+    if npm_task is None:
         print("⚠️  Frontend directory not found, skipping frontend startup")
         return None
     
     try:
-        # Check if node_modules exists
-        if not (frontend_path / "node_modules").exists():
-            print("📦 Installing frontend dependencies...")
-            subprocess.run(["npm", "install"], cwd=frontend_path, check=True)
-        
-        # Start frontend in background
-        frontend_process = subprocess.Popen([
-            "npm", "start"
-        ], cwd=frontend_path)
+        # No point installing or starting the frontend if the backend goes down
+        backend_down = asyncio.create_task(backend_failed.wait())
+        await asyncio.wait({npm_task, backend_down}, return_when=asyncio.FIRST_COMPLETED)
+        backend_down.cancel()
+        if backend_failed.is_set():
+            npm_task.cancel()
+            await asyncio.gather(npm_task, return_exceptions=True)
+            return None
         
-        # Wait for frontend to start
-        print("⏳ Waiting for frontend to start...")
-        for i in range(60):  # Wait up to 60 seconds
-            try:
-                response = requests.get("http://localhost:3000", timeout=1)
-                if response.status_code == 200:
-                    print("✅ Frontend server is running on http://localhost:3000")
-                    return frontend_process
-            except requests.exceptions.RequestException:
-                pass
-            time.sleep(1)
+        if not npm_task.result():
+            raise RuntimeError("npm install failed")
         
-        print("❌ Frontend server failed to start")
-        frontend_process.terminate()
-        return None
+        # Start frontend in background
+        print("🎨 Starting frontend server...")
+        frontend_process = await asyncio.create_subprocess_exec(
+            "npm", "start", cwd=frontend_path
+        )
         
     except Exception as e:
         print(f"❌ Failed to start frontend: {e}")
         return None
+    
+    if await wait_for_frontend(client, backend_failed):
+        return frontend_process
+    
+    await _stop_process(frontend_process)
+    return None
 
 
-def main():
-    """Main startup function."""
+async def wait_for_backend(client, backend_failed):
+    """Wait for the backend to answer its health check."""
+    if await _wait_for_http(client, "http://localhost:8000/health", 30):
+        print("✅ Backend server is running on http://localhost:8000")
+        return True
+    
+    print("❌ Backend server failed to start")
+    backend_failed.set()
+    return False
+
+
+async def wait_for_frontend(client, backend_failed):
+    """Wait for the frontend to answer, giving up early if the backend failed."""
+    if await _wait_for_http(client, "http://localhost:3000", 60, backend_failed):
+        print("✅ Frontend server is running on http://localhost:3000")
+        return True
+    
+    if not backend_failed.is_set():
+        print("❌ Frontend server failed to start")
+    return False
+
+
+async def _stop_process(process):
+    """Terminate a child process if it is still running and reap it."""
+    if process.returncode is None:
+        process.terminate()
+    await process.wait()
+
+
+async def amain():
+    """Start the system and wait until it is interrupted or a server exits."""
     print("🚀 MiniMart AI Inventory Management System")
     print("=" * 50)
     
     # Change to project root
-    project_root = Path(__file__).parent
+    project_root = Path(__file__).resolve().parent
     os.chdir(project_root)
     
     # Check dependencies
@@ -179,12 +258,34 @@ def main():
         sys.exit(1)
     
     # Start backend
-    backend_process = start_backend()
+    backend_process = await start_backend()
     if not backend_process:
         sys.exit(1)
     
-    # Start frontend
-    frontend_process = start_frontend()
+    # Install frontend dependencies while the backend boots
+    frontend_path = project_root / "frontend"
+    npm_task = None
+    if os.path.isdir(frontend_path):
+        npm_task = asyncio.create_task(_ensure_node_modules(frontend_path))
+    
+    # Wait for the backend while the frontend installs and starts; a backend
+    # failure stops the frontend probe
+    print("⏳ Waiting for servers to start...")
+    backend_failed = asyncio.Event()
+    # One pooled client is reused by every probe
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=4)) as client:
+        backend_ok, frontend_process = await asyncio.gather(
+            wait_for_backend(client, backend_failed),
+            start_frontend(client, frontend_path, npm_task, backend_failed)
+        )
+    
+    if not backend_ok:
+        if frontend_process:
+            await _stop_process(frontend_process)
+        await _stop_process(backend_process)
+        sys.exit(1)
+    
+    processes = [p for p in (backend_process, frontend_process) if p]
     
     print("\n" + "=" * 50)
     print("🎉 SYSTEM STARTED SUCCESSFULLY!")
@@ -195,23 +296,42 @@ def main():
     print("💚 Health Check: http://localhost:8000/health")
     print("\nPress Ctrl+C to stop the system")
     
+    # Sleep until Ctrl+C or until either server exits on its own
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+    
+    waiters = [asyncio.create_task(stop_event.wait())]
+    waiters += [asyncio.create_task(process.wait()) for process in processes]
     try:
-        # Keep the script running
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+        
         print("\n🛑 Shutting down system...")
         
         if frontend_process:
-            frontend_process.terminate()
+            await _stop_process(frontend_process)
             print("✅ Frontend stopped")
         
-        if backend_process:
-            backend_process.terminate()
-            print("✅ Backend stopped")
+        await _stop_process(backend_process)
+        print("✅ Backend stopped")
         
         print("👋 System shutdown complete")
 
 
+def main():
+    """Main startup function."""
+    try:
+        asyncio.run(amain())
+    except KeyboardInterrupt:
+        pass
+
+
 if __name__ == "__main__":
     main()
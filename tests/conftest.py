@@ -1,236 +1,258 @@
 """Test configuration and fixtures."""
 
 import pytest
-import asyncio
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert, select
 from sqlalchemy.orm import sessionmaker
-from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from httpx import ASGITransport, AsyncClient
 from app.main import app
 from app.database.database import get_db, Base
 from app.models.models import *
-from app.core.config import settings
 
 # Test database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = "sqlite://"
 
-# Create test engine
+# Create test engine; StaticPool shares the one in-memory connection across threads.
+# Each pytest-xdist worker is its own process, so each gets a private database.
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool
 )
 
+# Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
 # Create test session
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def _schema():
+    """Create the tables once for the whole test session."""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+def db_session(_schema):
+    """Create a database session whose changes are rolled back after each test."""
+    connection = engine.connect()
+    transaction = connection.begin()
     
-    # Create session
-    session = TestingSessionLocal()
+    # Commits made by the code under test only release a SAVEPOINT; objects
+    # are not expired on commit, so fixtures need no refresh round trips
+    session = TestingSessionLocal(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False
+    )
     
     try:
         yield session
     finally:
         session.close()
-        # Drop tables
-        Base.metadata.drop_all(bind=engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with database dependency override."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
-    app.dependency_overrides[get_db] = override_get_db
+async def client(db_session):
+    """Async client that calls the app in the test's event loop, using this test's rolled-back session."""
+    app.dependency_overrides[get_db] = lambda: db_session
     
-    with TestClient(app) as test_client:
-        yield test_client
+    # ASGITransport skips the lifespan; _schema has already created the tables
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as async_client:
+        yield async_client
     
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def sample_products(db_session):
-    """Create sample products for testing."""
-    products = [
-        Product(
-            name="Test Product 1",
-            description="Test description 1",
-            category=ProductCategory.BEVERAGES,
-            sku="TEST001",
-            unit_price=10.0,
-            cost_price=7.0,
-            unit_of_measure="piece",
-            brand="Test Brand"
-        ),
-        Product(
-            name="Test Product 2",
-            description="Test description 2",
-            category=ProductCategory.SNACKS,
-            sku="TEST002",
-            unit_price=15.0,
-            cost_price=10.0,
-            unit_of_measure="pack",
-            brand="Test Brand"
-        )
-    ]
-    
-    for product in products:
-        db_session.add(product)
-    
-    db_session.commit()
-    
-    for product in products:
-        db_session.refresh(product)
+class _StubAgent:
+    """Stands in for an agent or the RAG system, answering every call with a canned result."""
     
-    return products
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            return {"success": True, "data": {}}
+        return call
 
 
 @pytest.fixture
-def sample_inventory(db_session, sample_products):
-    """Create sample inventory for testing."""
-    inventory_items = []
+def mock_agents(request, monkeypatch):
+    """Replace the agents behind the agents API with stubs, unless the test is marked live."""
+    if request.node.get_closest_marker("live"):
+        return
     
-    for product in sample_products:
-        inventory = Inventory(
-            product_id=product.id,
-            current_stock=100,
-            reserved_stock=0,
-            available_stock=100,
-            reorder_point=20,
-            reorder_quantity=50,
-            safety_stock=10,
-            maximum_stock=200
-        )
-        db_session.add(inventory)
-        inventory_items.append(inventory)
-    
-    db_session.commit()
-    
-    for inventory in inventory_items:
-        db_session.refresh(inventory)
-    
-    return inventory_items
+    from app.api.v1.endpoints import agents as agents_endpoints
+    for name in (
+        "SupervisorAgent", "DemandForecastAgent", "OrderPlacementAgent",
+        "SupplierAgent", "LogisticsAgent", "RAGSystem"
+    ):
+        monkeypatch.setattr(agents_endpoints, name, _StubAgent)
+
+
+@pytest.fixture(scope="session")
+def _seed(_schema):
+    """Insert the baseline sample rows once; each test's changes to them are rolled back."""
+    session = TestingSessionLocal()
+    try:
+        # Bulk INSERT ... RETURNING hands back the rows without per-object flushes
+        products = session.scalars(
+            insert(Product).returning(Product, sort_by_parameter_order=True),
+            [
+                dict(
+                    name="Test Product 1",
+                    description="Test description 1",
+                    category=ProductCategory.BEVERAGES,
+                    sku="TEST001",
+                    unit_price=10.0,
+                    cost_price=7.0,
+                    unit_of_measure="piece",
+                    brand="Test Brand"
+                ),
+                dict(
+                    name="Test Product 2",
+                    description="Test description 2",
+                    category=ProductCategory.SNACKS,
+                    sku="TEST002",
+                    unit_price=15.0,
+                    cost_price=10.0,
+                    unit_of_measure="pack",
+                    brand="Test Brand"
+                )
+            ]
+        ).all()
+        
+        session.execute(insert(Inventory), [
+            dict(
+                product_id=product.id,
+                current_stock=100,
+                reserved_stock=0,
+                reorder_point=20,
+                reorder_quantity=50,
+                safety_stock=10,
+                maximum_stock=200
+            )
+            for product in products
+        ])
+        
+        session.execute(insert(SalesTransaction), [
+            dict(
+                product_id=products[0].id,
+                quantity=2,
+                unit_price=10.0,
+                total_amount=20.0
+            )
+            for i in range(10)
+        ])
+        
+        session.execute(insert(Supplier), [
+            dict(
+                name="Test Supplier 1",
+                email="supplier1@test.com",
+                contact_person="John Doe",
+                payment_terms="Net 30",
+                delivery_lead_time_days=5,
+                minimum_order_value=100.0
+            ),
+            dict(
+                name="Test Supplier 2",
+                email="supplier2@test.com",
+                contact_person="Jane Smith",
+                payment_terms="Net 15",
+                delivery_lead_time_days=3,
+                minimum_order_value=150.0
+            )
+        ])
+        
+        customer_ids = session.scalars(
+            insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+            [
+                dict(
+                    name="Test Customer 1",
+                    email="customer1@test.com",
+                    phone="+1-555-0101"
+                ),
+                dict(
+                    name="Test Customer 2",
+                    email="customer2@test.com",
+                    phone="+1-555-0102"
+                )
+            ]
+        ).all()
+        
+        session.execute(insert(Order), [
+            dict(
+                customer_id=customer_id,
+                order_number=f"TEST-ORD-{i+1:03d}",
+                total_amount=25.0,
+                status=OrderStatus.PENDING
+            )
+            for i, customer_id in enumerate(customer_ids)
+        ])
+        
+        session.commit()
+    finally:
+        session.close()
+
+
+def _seeded(db_session, model):
+    """Load the seeded rows of a model through the test's session."""
+    return db_session.scalars(select(model).order_by(model.id)).all()
 
 
 @pytest.fixture
-def sample_suppliers(db_session):
-    """Create sample suppliers for testing."""
-    suppliers = [
-        Supplier(
-            name="Test Supplier 1",
-            email="supplier1@test.com",
-            contact_person="John Doe",
-            payment_terms="Net 30",
-            delivery_lead_time_days=5,
-            minimum_order_value=100.0
-        ),
-        Supplier(
-            name="Test Supplier 2",
-            email="supplier2@test.com",
-            contact_person="Jane Smith",
-            payment_terms="Net 15",
-            delivery_lead_time_days=3,
-            minimum_order_value=150.0
-        )
-    ]
-    
-    for supplier in suppliers:
-        db_session.add(supplier)
-    
-    db_session.commit()
-    
-    for supplier in suppliers:
-        db_session.refresh(supplier)
-    
-    return suppliers
+def sample_products(db_session, _seed):
+    """Sample products for testing."""
+    return _seeded(db_session, Product)
 
 
 @pytest.fixture
-def sample_customers(db_session):
-    """Create sample customers for testing."""
-    customers = [
-        Customer(
-            name="Test Customer 1",
-            email="customer1@test.com",
-            phone="+1-555-0101"
-        ),
-        Customer(
-            name="Test Customer 2",
-            email="customer2@test.com",
-            phone="+1-555-0102"
-        )
-    ]
-    
-    for customer in customers:
-        db_session.add(customer)
-    
-    db_session.commit()
-    
-    for customer in customers:
-        db_session.refresh(customer)
-    
-    return customers
+def sample_inventory(db_session, _seed):
+    """Sample inventory for testing."""
+    return _seeded(db_session, Inventory)
 
 
 @pytest.fixture
-def sample_orders(db_session, sample_customers, sample_products):
-    """Create sample orders for testing."""
-    orders = []
-    
-    for i, customer in enumerate(sample_customers):
-        order = Order(
-            customer_id=customer.id,
-            order_number=f"TEST-ORD-{i+1:03d}",
-            total_amount=25.0,
-            status=OrderStatus.PENDING
-        )
-        db_session.add(order)
-        orders.append(order)
-    
-    db_session.commit()
-    
-    for order in orders:
-        db_session.refresh(order)
-    
-    return orders
+def sample_suppliers(db_session, _seed):
+    """Sample suppliers for testing."""
+    return _seeded(db_session, Supplier)
 
 
 @pytest.fixture
-def sample_sales_transactions(db_session, sample_products, sample_customers):
-    """Create sample sales transactions for testing."""
-    transactions = []
-    
-    for i in range(10):
-        transaction = SalesTransaction(
-            product_id=sample_products[0].id,
-            customer_id=sample_customers[0].id,
-            quantity=2,
-            unit_price=10.0,
-            total_amount=20.0
-        )
-        db_session.add(transaction)
-        transactions.append(transaction)
-    
-    db_session.commit()
-    
-    for transaction in transactions:
-        db_session.refresh(transaction)
+def sample_customers(db_session, _seed):
+    """Sample customers for testing."""
+    return _seeded(db_session, Customer)
+
+
+@pytest.fixture
+def sample_orders(db_session, _seed):
+    """Sample orders for testing."""
+    return _seeded(db_session, Order)
+
+
+@pytest.fixture
+def sample_sales_transactions(db_session, _seed):
+    """Sample sales transactions for testing."""
+    return _seeded(db_session, SalesTransaction)
+
+
+@pytest.fixture
+def low_stock_product(db_session, sample_products):
+    """A sample product whose stock is set below its reorder point."""
+    inventory = db_session.scalars(
+        select(Inventory).filter_by(product_id=sample_products[0].id)
+    ).one()
+    inventory.current_stock = 1
+    db_session.flush()
     
-    return transactions
+    return sample_products[0]